@@ -24,16 +24,25 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
-from typing import Optional, List
-import sqlite3
+from typing import Final, Optional, List
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import aiosqlite
+import asyncio
+import threading
 from datetime import datetime, timedelta
+import base64
+import bcrypt
 import dateparser
+import functools
+import orjson
 import re
 import hashlib
+import hmac
 import secrets
-import json
+import time
 import os
 
 # =============================================================================
@@ -44,90 +53,257 @@ import os
 # Railway will set this automatically, or you can set it in the dashboard
 SECRET_KEY = os.environ.get("SECRET_KEY", secrets.token_hex(32))
 
+# Pre-encoded once: the HMAC key is needed as bytes on every token
+# signature and verification, so don't re-encode it per call
+_SECRET_KEY_BYTES = SECRET_KEY.encode()
+
 # Database file
 DATABASE_NAME = os.environ.get("DATABASE_PATH", "clear.db")
 
 # Token expiration (7 days)
 TOKEN_EXPIRATION_DAYS = 7
 
+# How often the background sweep deletes expired token rows (10 minutes)
+TOKEN_SWEEP_INTERVAL_SECONDS = 600
+
 # =============================================================================
 # DATABASE SETUP
 # =============================================================================
 
-def get_database_connection():
-    """Creates a connection to our SQLite database."""
-    connection = sqlite3.connect(DATABASE_NAME)
-    connection.row_factory = sqlite3.Row
+async def _create_connection() -> aiosqlite.Connection:
+    """Opens the shared SQLite connection and tunes it for a web workload."""
+    connection = await aiosqlite.connect(
+        DATABASE_NAME,
+        isolation_level=None,  # autocommit; SQLite handles transactions itself
+        cached_statements=256  # keep our prepared statements alive between calls
+    )
+    connection.row_factory = aiosqlite.Row
+
+    # WAL lets readers and the writer proceed concurrently, and NORMAL sync
+    # avoids an fsync per transaction. The rest keeps hot pages in memory.
+    await connection.execute("PRAGMA journal_mode=WAL")
+    await connection.execute("PRAGMA synchronous=NORMAL")
+    await connection.execute("PRAGMA temp_store=memory")
+    await connection.execute("PRAGMA cache_size=-64000")
+    await connection.execute("PRAGMA mmap_size=268435456")
+
     return connection
 
 
-def initialize_database():
+# One aiosqlite connection for the whole process, created in startup_event
+# (aiosqlite needs a running event loop). Queries run on aiosqlite's worker
+# thread, so SQLite waits overlap with other requests instead of blocking
+# the event loop; a single connection per process is the sweet spot for
+# SQLite, pooling buys nothing.
+_connection: Optional[aiosqlite.Connection] = None
+
+# Serializes writers and read-modify-write sequences. WAL allows a single
+# writer at a time, so writes queue here instead of hitting SQLITE_BUSY.
+_db_lock = asyncio.Lock()
+
+
+def get_database_connection() -> aiosqlite.Connection:
+    """Returns the shared SQLite connection (created at startup)."""
+    return _connection
+
+
+@asynccontextmanager
+async def tx(connection):
     """
-    Creates all necessary tables if they don't exist.
+    Groups several writes into one explicit transaction.
 
-    Tables:
-    - users: Stores user accounts (id, username, password_hash, created_at)
-    - tasks: Stores tasks with a user_id foreign key
-    - tokens: Stores active JWT tokens for session management
+    In autocommit mode every statement commits (and under WAL, fsyncs)
+    on its own; BEGIN IMMEDIATE ... COMMIT collapses a multi-write flow
+    into a single WAL frame commit. Takes the write lock, so don't nest
+    it inside another locked section.
     """
-    connection = get_database_connection()
-    cursor = connection.cursor()
+    async with _db_lock:
+        await connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            await connection.execute("ROLLBACK")
+            raise
+        else:
+            await connection.execute("COMMIT")
 
-    # Users table
-    cursor.execute("""
+
+# Table definitions, shared by initialize_database() and the timestamp
+# migration below. Timestamps are INTEGER unix epochs: 8 bytes instead of
+# ~20 of ISO text, and every comparison or ORDER BY is an integer compare
+# instead of a string compare.
+_TABLE_DDL = {
+    "users": """
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             username TEXT UNIQUE NOT NULL,
             password_hash TEXT NOT NULL,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP
         )
-    """)
-
-    # Tasks table (now with user_id)
-    cursor.execute("""
+    """,
+    "tasks": """
         CREATE TABLE IF NOT EXISTS tasks (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER NOT NULL,
             content TEXT NOT NULL,
             status TEXT DEFAULT 'pending',
             due_date TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            created_at INTEGER DEFAULT (strftime('%s', 'now')),
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
-    """)
-
-    # Tokens table (for token validation/revocation)
-    cursor.execute("""
+    """,
+    "tokens": """
         CREATE TABLE IF NOT EXISTS tokens (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             user_id INTEGER NOT NULL,
             token TEXT UNIQUE NOT NULL,
-            expires_at TEXT NOT NULL,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            expires_at INTEGER NOT NULL,
+            created_at INTEGER DEFAULT (strftime('%s', 'now')),
             FOREIGN KEY (user_id) REFERENCES users (id)
         )
-    """)
+    """,
+}
+
 
-    connection.commit()
-    connection.close()
+async def _migrate_text_timestamps(connection) -> None:
+    """
+    One-time shadow-copy migration of tasks/tokens tables whose timestamp
+    columns predate the INTEGER epoch layout.
+    """
+    for table, copy_sql in (
+        ("tasks", """
+            INSERT INTO {new} (id, user_id, content, status, due_date, created_at)
+            SELECT id, user_id, content, status, due_date,
+                   CAST(strftime('%s', created_at) AS INTEGER)
+            FROM {old}
+        """),
+        ("tokens", """
+            INSERT INTO {new} (id, user_id, token, expires_at, created_at)
+            SELECT id, user_id, token,
+                   CAST(strftime('%s', expires_at) AS INTEGER),
+                   CAST(strftime('%s', created_at) AS INTEGER)
+            FROM {old}
+        """),
+    ):
+        cursor = await connection.execute(
+            f"SELECT type FROM pragma_table_info('{table}') WHERE name = 'created_at'"
+        )
+        row = await cursor.fetchone()
+        if row is None or row[0] != "TEXT":
+            continue
+        old = f"{table}_text_ts"
+        await connection.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        await connection.execute(_TABLE_DDL[table])
+        await connection.execute(copy_sql.format(new=table, old=old))
+        await connection.execute(f"DROP TABLE {old}")
+
+
+async def initialize_database():
+    """
+    Creates all necessary tables if they don't exist.
+
+    Tables:
+    - users: Stores user accounts (id, username, password_hash, created_at)
+    - tasks: Stores tasks with a user_id foreign key
+    - tokens: Stores active JWT tokens for session management
+    """
+    connection = get_database_connection()
+    async with _db_lock:
+        for ddl in _TABLE_DDL.values():
+            await connection.execute(ddl)
+
+        # Databases created before the epoch switch stored timestamps as
+        # ISO text; rebuild those tables once with the values converted.
+        await _migrate_text_timestamps(connection)
+
+        # Indexes for the columns every request filters on. Without these,
+        # token lookups and per-user task queries scan the whole table.
+        # (users.username is UNIQUE, which already gives it an index.)
+        await connection.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_tokens_token ON tokens(token)"
+        )
+        await connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_user_status ON tasks(user_id, status, due_date)"
+        )
+        await connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_user_due ON tasks(user_id, due_date)"
+        )
+
+        # Refresh planner statistics so the composite indexes get picked
+        await connection.execute("ANALYZE")
+
+
+# =============================================================================
+# SQL STATEMENTS
+# =============================================================================
+# Every query lives here as a module-level constant so the exact same string
+# object is passed to execute() each time. sqlite3 keeps an LRU cache of
+# prepared statements keyed by SQL text (sized via cached_statements above),
+# so stable strings mean the parse/plan work happens once, not per request.
+
+SQL_SELECT_USER_ID: Final[str] = "SELECT id FROM users WHERE username = ?"
+SQL_SELECT_USER_AUTH: Final[str] = "SELECT id, password_hash FROM users WHERE username = ?"
+SQL_INSERT_USER: Final[str] = "INSERT INTO users (username, password_hash) VALUES (?, ?)"
+
+SQL_INSERT_TOKEN: Final[str] = "INSERT INTO tokens (user_id, token, expires_at) VALUES (?, ?, ?)"
+SQL_SELECT_TOKEN: Final[str] = "SELECT id FROM tokens WHERE token = ?"
+SQL_DELETE_TOKEN: Final[str] = "DELETE FROM tokens WHERE token = ?"
+SQL_DELETE_EXPIRED_TOKENS: Final[str] = "DELETE FROM tokens WHERE expires_at < ?"
+
+# List queries name the rendered columns explicitly - user_id is already
+# known (we filtered on it), so SELECT * would only move redundant bytes
+# across the SQLite boundary and build wider Row objects.
+SQL_SELECT_TASKS_DUE_TODAY: Final[str] = (
+    "SELECT id, content, status, due_date, created_at FROM tasks "
+    "WHERE user_id = ? AND due_date = ? AND status = 'pending' ORDER BY created_at"
+)
+SQL_SELECT_TASKS_DONE: Final[str] = (
+    "SELECT id, content, status, due_date, created_at FROM tasks "
+    "WHERE user_id = ? AND status = 'done' ORDER BY created_at DESC"
+)
+SQL_SELECT_TASKS_PENDING: Final[str] = (
+    "SELECT id, content, status, due_date, created_at FROM tasks "
+    "WHERE user_id = ? AND status = 'pending' ORDER BY due_date, created_at"
+)
+SQL_MATCH_PENDING_BASE: Final[str] = (
+    "SELECT id, content FROM tasks WHERE user_id = ? AND status = 'pending'"
+)
+SQL_SELECT_ALL_TASKS: Final[str] = (
+    "SELECT id, content, status, due_date, created_at FROM tasks WHERE user_id = ? "
+    "ORDER BY status, due_date, created_at"
+)
+SQL_SELECT_TASK_STATUS: Final[str] = "SELECT status FROM tasks WHERE id = ? AND user_id = ?"
+SQL_INSERT_TASK: Final[str] = (
+    "INSERT INTO tasks (user_id, content, status, due_date) VALUES (?, ?, 'pending', ?)"
+)
+SQL_MARK_TASK_DONE: Final[str] = "UPDATE tasks SET status = 'done' WHERE id = ? AND user_id = ?"
+SQL_UPDATE_TASK_STATUS: Final[str] = "UPDATE tasks SET status = ? WHERE id = ? AND user_id = ?"
+SQL_DELETE_TASK: Final[str] = "DELETE FROM tasks WHERE id = ? AND user_id = ?"
 
 
 # =============================================================================
 # AUTHENTICATION HELPERS
 # =============================================================================
 
+# bcrypt cost factor - 12 keeps a hash around 250ms, slow enough to resist
+# brute force but tolerable for a login
+BCRYPT_ROUNDS = 12
+
+
 def hash_password(password: str) -> str:
-    """
-    Hashes a password using SHA-256 with a salt.
-    In production, consider using bcrypt (requires additional dependency).
-    """
-    salt = secrets.token_hex(16)
-    password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}${password_hash}"
+    """Hashes a password using bcrypt."""
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 
 def verify_password(password: str, stored_hash: str) -> bool:
-    """Verifies a password against its stored hash."""
+    """
+    Verifies a password against its stored hash.
+
+    Supports both bcrypt hashes (new accounts) and the legacy
+    "salt$sha256" format so existing users can still log in.
+    """
+    if stored_hash.startswith("$2"):
+        return bcrypt.checkpw(password.encode(), stored_hash.encode())
     try:
         salt, hash_value = stored_hash.split("$")
         password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
@@ -136,12 +312,28 @@ def verify_password(password: str, stored_hash: str) -> bool:
         return False
 
 
-def create_token(user_id: int, username: str) -> str:
+async def hash_password_async(password: str) -> str:
+    """Runs hash_password in a worker thread so it doesn't block the event loop."""
+    return await asyncio.to_thread(hash_password, password)
+
+
+async def verify_password_async(password: str, stored_hash: str) -> bool:
+    """Runs verify_password in a worker thread so it doesn't block the event loop."""
+    return await asyncio.to_thread(verify_password, password, stored_hash)
+
+
+def _sign_payload(payload_b64: bytes) -> str:
+    """Signs the base64 payload with the pre-encoded secret key."""
+    return hmac.new(_SECRET_KEY_BYTES, payload_b64, "sha256").hexdigest()[:16]
+
+
+def _generate_token(user_id: int, username: str) -> "tuple[str, int]":
     """
-    Creates a simple JWT-like token.
+    Builds a simple JWT-like token (no database access).
     Format: base64(json({user_id, username, expires, random})).signature
+    Returns the token string and its expiry as a unix epoch.
     """
-    expires = (datetime.now() + timedelta(days=TOKEN_EXPIRATION_DAYS)).isoformat()
+    expires = int((datetime.now() + timedelta(days=TOKEN_EXPIRATION_DAYS)).timestamp())
 
     # Create token payload
     payload = {
@@ -151,62 +343,118 @@ def create_token(user_id: int, username: str) -> str:
         "random": secrets.token_hex(8)
     }
 
-    # Encode payload
-    import base64
-    payload_json = json.dumps(payload)
-    payload_b64 = base64.urlsafe_b64encode(payload_json.encode()).decode()
+    # Encode payload; urlsafe_b64encode returns bytes, which is what the
+    # signature wants - decode to text only once, when assembling the token
+    payload_b64 = base64.urlsafe_b64encode(orjson.dumps(payload))
+    signature = _sign_payload(payload_b64)
 
-    # Create signature
-    signature = hashlib.sha256((payload_b64 + SECRET_KEY).encode()).hexdigest()[:16]
+    return f"{payload_b64.decode()}.{signature}", expires
 
-    token = f"{payload_b64}.{signature}"
 
-    # Store token in database
+async def create_token(user_id: int, username: str) -> str:
+    """Creates a token and stores it for validation/revocation."""
+    token, expires = _generate_token(user_id, username)
+
     connection = get_database_connection()
-    cursor = connection.cursor()
-    cursor.execute(
-        "INSERT INTO tokens (user_id, token, expires_at) VALUES (?, ?, ?)",
-        (user_id, token, expires)
-    )
-    connection.commit()
-    connection.close()
+    async with _db_lock:
+        await connection.execute(SQL_INSERT_TOKEN, (user_id, token, expires))
 
     return token
 
 
-def verify_token(token: str) -> Optional[dict]:
+# Cache of already-verified tokens: token -> (payload, fresh-until epoch).
+# A token is immutable until it expires or is revoked, so once it has passed
+# signature + DB checks there is no need to repeat them on every request.
+# Entries stay fresh only briefly: with several worker processes, /logout
+# deletes the DB row but can only evict the handling worker's cache, so the
+# others must re-check the database soon after instead of trusting a hit
+# until the token's own expiry. Bounded LRU so a flood of garbage tokens
+# can't grow it without limit.
+TOKEN_CACHE_MAX_SIZE = 10_000
+TOKEN_CACHE_TTL_SECONDS = 60
+
+_token_cache: "OrderedDict[str, tuple]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
+_token_sweeper_task: Optional[asyncio.Task] = None
+
+
+async def _token_sweeper():
+    """
+    Periodically deletes expired rows from the tokens table.
+
+    Expired tokens already fail verification, but their rows used to pile
+    up forever and slow the WHERE token = ? lookup. Sweeping in the
+    background amortizes the cleanup instead of paying it per request.
+    """
+    connection = get_database_connection()
+    while True:
+        await asyncio.sleep(TOKEN_SWEEP_INTERVAL_SECONDS)
+        try:
+            async with _db_lock:
+                await connection.execute(SQL_DELETE_EXPIRED_TOKENS, (int(time.time()),))
+        except Exception as error:
+            # A failed sweep (e.g. the file locked by another worker) must
+            # not end all future sweeps; retry on the next interval.
+            print(f"Token sweep failed, retrying next interval: {error}")
+
+
+async def invalidate_token(token: str) -> None:
+    """Revokes a token: drops it from the cache and deletes its DB row."""
+    with _token_cache_lock:
+        _token_cache.pop(token, None)
+    connection = get_database_connection()
+    async with _db_lock:
+        await connection.execute(SQL_DELETE_TOKEN, (token,))
+
+
+async def verify_token(token: str) -> Optional[dict]:
     """
     Verifies a token and returns the payload if valid.
     Returns None if invalid or expired.
     """
-    try:
-        import base64
+    # Fast path: token verified recently and still within its freshness
+    # window; stale entries fall through to the full check below, which
+    # notices tokens another worker has revoked in the meantime
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+        if cached is not None:
+            payload, fresh_until = cached
+            if time.time() < fresh_until:
+                _token_cache.move_to_end(token)
+                return payload
+            del _token_cache[token]
 
+    try:
         # Split token
         payload_b64, signature = token.split(".")
 
-        # Verify signature
-        expected_signature = hashlib.sha256((payload_b64 + SECRET_KEY).encode()).hexdigest()[:16]
-        if signature != expected_signature:
+        # Verify signature (compare_digest is constant-time)
+        payload_b64_bytes = payload_b64.encode()
+        if not hmac.compare_digest(signature, _sign_payload(payload_b64_bytes)):
             return None
 
         # Decode payload
-        payload_json = base64.urlsafe_b64decode(payload_b64.encode()).decode()
-        payload = json.loads(payload_json)
+        payload = orjson.loads(base64.urlsafe_b64decode(payload_b64_bytes))
 
-        # Check expiration
-        expires = datetime.fromisoformat(payload["expires"])
-        if datetime.now() > expires:
+        # Check expiration (integer compare, no string parsing)
+        if time.time() > payload["expires"]:
             return None
 
         # Verify token exists in database (not revoked)
         connection = get_database_connection()
-        cursor = connection.cursor()
-        cursor.execute("SELECT id FROM tokens WHERE token = ?", (token,))
-        if not cursor.fetchone():
-            connection.close()
-            return None
-        connection.close()
+        async with connection.execute(SQL_SELECT_TOKEN, (token,)) as cursor:
+            if not await cursor.fetchone():
+                return None
+
+        # Remember the verified token so the next request skips the DB
+        fresh_until = min(time.time() + TOKEN_CACHE_TTL_SECONDS, payload["expires"])
+        with _token_cache_lock:
+            _token_cache[token] = (payload, fresh_until)
+            _token_cache.move_to_end(token)
+            while len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+                _token_cache.popitem(last=False)
 
         return payload
 
@@ -247,7 +495,7 @@ class Task(BaseModel):
     content: str
     status: str
     due_date: Optional[str]
-    created_at: str
+    created_at: int
 
 
 class NaturalLanguageInput(BaseModel):
@@ -278,7 +526,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Not authenticated"
         )
 
-    payload = verify_token(credentials.credentials)
+    payload = await verify_token(credentials.credentials)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -309,11 +557,56 @@ def process_voice_input(audio_data: bytes) -> str:
 # NATURAL LANGUAGE PROCESSING
 # =============================================================================
 
+_WEEKDAY_INDEX = {'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6}
+
+
+def _resolve_weekday(match: "re.Match") -> datetime:
+    """Resolves "next monday" / "on tuesday" to the upcoming occurrence."""
+    today = datetime.now()
+    days_ahead = (_WEEKDAY_INDEX[match.group(1)] - today.weekday()) % 7
+    return today + timedelta(days=days_ahead or 7)
+
+
+def _resolve_month_day(match: "re.Match") -> Optional[datetime]:
+    """Resolves "on 4/15" to the next occurrence of that month/day."""
+    today = datetime.now()
+    try:
+        candidate = datetime(today.year, int(match.group(1)), int(match.group(2)))
+    except ValueError:
+        return None
+    if candidate.date() < today.date():
+        candidate = candidate.replace(year=today.year + 1)
+    return candidate
+
+
+# Fast recognizers for the date phrasings the rest of the code already
+# special-cases. dateparser loads locale data and tries dozens of formats
+# per call (hundreds of ms cold, tens warm), so the common cases are
+# resolved with precompiled regexes and plain arithmetic instead.
+_DATE_PATTERNS = [
+    (re.compile(r'\btomorrow\b'), lambda m: datetime.now() + timedelta(days=1)),
+    (re.compile(r'\btoday\b'), lambda m: datetime.now()),
+    (re.compile(r'\bin (\d+) days?\b'), lambda m: datetime.now() + timedelta(days=int(m.group(1)))),
+    (re.compile(r'\b(?:next|on|this) (mon|tue|wed|thu|fri|sat|sun)[a-z]*\b'), _resolve_weekday),
+    (re.compile(r'\bon (\d{1,2})/(\d{1,2})\b'), _resolve_month_day),
+]
+
+
 def parse_date_from_text(text: str) -> Optional[str]:
     """Extracts and parses dates from natural language text."""
+    # Memoized per calendar day: relative phrases ("tomorrow") resolve
+    # against today, so the date bucket keeps cached answers from going
+    # stale across midnight while repeated phrasings skip the parse.
+    return _parse_date_cached(text, datetime.now().date().isoformat())
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date_cached(text: str, _day_bucket: str) -> Optional[str]:
+    """Cached worker for parse_date_from_text; _day_bucket only keys the cache."""
+    text_lower = text.lower()
 
     # Special handling for "end of week"
-    if "end of week" in text.lower():
+    if "end of week" in text_lower:
         today = datetime.now()
         days_until_sunday = (6 - today.weekday()) % 7
         if days_until_sunday == 0:
@@ -322,7 +615,7 @@ def parse_date_from_text(text: str) -> Optional[str]:
         return end_of_week.strftime("%Y-%m-%d")
 
     # Special handling for "end of month"
-    if "end of month" in text.lower():
+    if "end of month" in text_lower:
         today = datetime.now()
         if today.month == 12:
             last_day = today.replace(day=31)
@@ -331,7 +624,20 @@ def parse_date_from_text(text: str) -> Optional[str]:
             last_day = next_month - timedelta(days=1)
         return last_day.strftime("%Y-%m-%d")
 
-    # Use dateparser for other date formats
+    # Fast path: the common phrasings, no dateparser involved. Absurd
+    # values ("in 99999999999 days") overflow datetime arithmetic; treat
+    # them like any other unresolvable phrase and keep going.
+    for pattern, resolve in _DATE_PATTERNS:
+        match = pattern.search(text_lower)
+        if match:
+            try:
+                resolved = resolve(match)
+            except (OverflowError, ValueError):
+                continue
+            if resolved is not None:
+                return resolved.strftime("%Y-%m-%d")
+
+    # Fall back to dateparser for anything else
     parsed_date = dateparser.parse(
         text,
         settings={
@@ -346,201 +652,210 @@ def parse_date_from_text(text: str) -> Optional[str]:
     return None
 
 
+# Compiled once at import: one alternation for command prefixes and one for
+# date references, so extract_task_content runs two regex passes instead of
+# twenty re.sub calls per invocation. Order matters within the alternations -
+# longer phrases ("add task") must come before their prefixes ("add").
+_PREFIX_RE = re.compile(
+    r"^(?:remind me to|add task|add|create task|i need to|i have to|i should"
+    r"|don't forget to|remember to)\s+",
+    re.IGNORECASE
+)
+_DATE_REF_RE = re.compile(
+    r'\s+(?:on \w+day|tomorrow|today|next \w+|this \w+|by end of (?:week|month)'
+    r'|end of (?:week|month)|in \d+ days?|on \d{1,2}/\d{1,2})\b',
+    re.IGNORECASE
+)
+
+
+@functools.lru_cache(maxsize=4096)
 def extract_task_content(text: str) -> str:
     """Cleans up the user's input to extract just the task content."""
+    cleaned_text = text.lower().strip()
+    cleaned_text = _PREFIX_RE.sub('', cleaned_text)
+    cleaned_text = _DATE_REF_RE.sub('', cleaned_text)
+    return cleaned_text.strip().capitalize()
 
-    prefixes_to_remove = [
-        r'^remind me to\s+',
-        r'^add task\s+',
-        r'^add\s+',
-        r'^create task\s+',
-        r'^i need to\s+',
-        r'^i have to\s+',
-        r'^i should\s+',
-        r'^don\'t forget to\s+',
-        r'^remember to\s+',
-    ]
 
-    cleaned_text = text.lower().strip()
+def _escape_like(word: str) -> str:
+    """Escapes LIKE metacharacters so user words match literally."""
+    return word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
-    for pattern in prefixes_to_remove:
-        cleaned_text = re.sub(pattern, '', cleaned_text, flags=re.IGNORECASE)
-
-    date_references = [
-        r'\s+on \w+day\b',
-        r'\s+tomorrow\b',
-        r'\s+today\b',
-        r'\s+next \w+\b',
-        r'\s+this \w+\b',
-        r'\s+by end of week\b',
-        r'\s+end of week\b',
-        r'\s+by end of month\b',
-        r'\s+end of month\b',
-        r'\s+in \d+ days?\b',
-        r'\s+on \d{1,2}/\d{1,2}\b',
-    ]
 
-    for pattern in date_references:
-        cleaned_text = re.sub(pattern, '', cleaned_text, flags=re.IGNORECASE)
+async def _find_matching_pending_task(connection, user_id: int, text_lower: str):
+    """
+    Finds one pending task whose content shares a significant word (>3 chars)
+    with the user's text. The common case runs inside SQLite via LIKE so only
+    the matching row crosses into Python; when that probe finds nothing, a
+    scan over the pending rows checks the other direction - a content word
+    appearing inside the message ("call" in "calling") - which is what the
+    original substring match caught.
+    """
+    # Dedupe and cap the probe words: each one becomes a LIKE clause, and
+    # SQLite rejects expression trees deeper than ~1000 nodes, so a pasted
+    # wall of text would otherwise turn the probe into a 500.
+    words = list(dict.fromkeys(
+        word for word in text_lower.split() if len(word) > 3
+    ))[:50]
+    if words:
+        sql = (
+            SQL_MATCH_PENDING_BASE
+            + " AND (" + " OR ".join(["content LIKE ? ESCAPE '\\'"] * len(words))
+            + ") LIMIT 1"
+        )
+        params = [user_id] + [f"%{_escape_like(word)}%" for word in words]
+        async with connection.execute(sql, params) as cursor:
+            row = await cursor.fetchone()
+        if row is not None:
+            return row
+
+    async with connection.execute(SQL_MATCH_PENDING_BASE, (user_id,)) as cursor:
+        pending = await cursor.fetchall()
+    for row in pending:
+        for word in row["content"].lower().split():
+            if len(word) > 3 and word in text_lower:
+                return row
+    return None
 
-    return cleaned_text.strip().capitalize()
 
+# Intent keywords as frozensets: the message is tokenized once and each
+# intent check is a C-level set intersection instead of a Python loop of
+# substring scans. Multi-word triggers go through one compiled regex.
+# Tokenizing on word characters (not whitespace) keeps punctuation off
+# the tokens, so "done." still triggers the done intent.
+_WORD_RE = re.compile(r"[\w']+")
+_SHOW_TOKENS = frozenset({'show', 'list', "what's", 'view'})
+_SHOW_PHRASE_RE = re.compile(r"what do i have|my tasks")
+_DONE_TOKENS = frozenset({'done', 'finished', 'complete', 'completed'})
+_DELETE_TOKENS = frozenset({'delete', 'remove', 'cancel'})
 
-def process_natural_language(text: str, user_id: int) -> AssistantResponse:
+
+async def _fetch_tasks(connection, sql: str, params: tuple) -> List[Task]:
+    """
+    Runs a task query and builds the Task models for the response.
+
+    model_construct skips per-field validation - the rows come straight
+    from our own schema, so there is nothing to validate per request.
+    """
+    async with connection.execute(sql, params) as cursor:
+        rows = await cursor.fetchall()
+    # Row is already mapping-like, so unpack it directly - no dict copy
+    return [Task.model_construct(**row) for row in rows]
+
+
+async def process_natural_language(text: str, user_id: int) -> AssistantResponse:
     """
     Processes natural language commands for a specific user.
     All task operations are scoped to the user_id.
     """
     text_lower = text.lower().strip()
+    tokens = frozenset(_WORD_RE.findall(text_lower))
     connection = get_database_connection()
-    cursor = connection.cursor()
 
-    try:
-        # INTENT: Show/List Tasks
-        if any(word in text_lower for word in ['show', 'list', 'what\'s', 'what do i have', 'my tasks', 'view']):
-
-            if 'today' in text_lower:
-                today = datetime.now().strftime("%Y-%m-%d")
-                cursor.execute(
-                    "SELECT * FROM tasks WHERE user_id = ? AND due_date = ? AND status = 'pending' ORDER BY created_at",
-                    (user_id, today)
-                )
-            elif 'done' in text_lower or 'completed' in text_lower:
-                cursor.execute(
-                    "SELECT * FROM tasks WHERE user_id = ? AND status = 'done' ORDER BY created_at DESC",
-                    (user_id,)
-                )
-            else:
-                cursor.execute(
-                    "SELECT * FROM tasks WHERE user_id = ? AND status = 'pending' ORDER BY due_date, created_at",
-                    (user_id,)
-                )
-
-            rows = cursor.fetchall()
-            tasks = [Task(**dict(row)) for row in rows]
-
-            if tasks:
-                return AssistantResponse(
-                    message=f"Here are your tasks ({len(tasks)} total):",
-                    tasks=tasks,
-                    action="list"
-                )
-            else:
-                return AssistantResponse(
-                    message="You have no pending tasks. Nice work!",
-                    tasks=[],
-                    action="list"
-                )
-
-        # INTENT: Mark Task as Done
-        elif any(word in text_lower for word in ['done', 'finished', 'complete', 'completed']):
-
-            cursor.execute(
-                "SELECT * FROM tasks WHERE user_id = ? AND status = 'pending'",
-                (user_id,)
+    # INTENT: Show/List Tasks
+    if tokens & _SHOW_TOKENS or _SHOW_PHRASE_RE.search(text_lower):
+
+        if 'today' in text_lower:
+            today = datetime.now().strftime("%Y-%m-%d")
+            tasks = await _fetch_tasks(connection, SQL_SELECT_TASKS_DUE_TODAY, (user_id, today))
+        elif 'done' in text_lower or 'completed' in text_lower:
+            tasks = await _fetch_tasks(connection, SQL_SELECT_TASKS_DONE, (user_id,))
+        else:
+            tasks = await _fetch_tasks(connection, SQL_SELECT_TASKS_PENDING, (user_id,))
+
+        if tasks:
+            return AssistantResponse(
+                message=f"Here are your tasks ({len(tasks)} total):",
+                tasks=tasks,
+                action="list"
+            )
+        else:
+            return AssistantResponse(
+                message="You have no pending tasks. Nice work!",
+                tasks=[],
+                action="list"
             )
-            pending_tasks = cursor.fetchall()
 
-            matched_task = None
-            for task in pending_tasks:
-                task_words = task['content'].lower().split()
-                if any(word in text_lower for word in task_words if len(word) > 3):
-                    matched_task = task
-                    break
+    # INTENT: Mark Task as Done
+    elif tokens & _DONE_TOKENS:
 
+        async with _db_lock:
+            matched_task = await _find_matching_pending_task(connection, user_id, text_lower)
             if matched_task:
-                cursor.execute(
-                    "UPDATE tasks SET status = 'done' WHERE id = ? AND user_id = ?",
-                    (matched_task['id'], user_id)
-                )
-                connection.commit()
-                return AssistantResponse(
-                    message=f"Great job! Marked '{matched_task['content']}' as done!",
-                    action="complete"
-                )
-            else:
-                tasks = [Task(**dict(row)) for row in pending_tasks]
-                return AssistantResponse(
-                    message="I couldn't find that task. Here are your pending tasks:",
-                    tasks=tasks,
-                    action="list"
-                )
-
-        # INTENT: Delete Task
-        elif any(word in text_lower for word in ['delete', 'remove', 'cancel']):
-
-            cursor.execute(
-                "SELECT * FROM tasks WHERE user_id = ? AND status = 'pending'",
-                (user_id,)
+                await connection.execute(SQL_MARK_TASK_DONE, (matched_task['id'], user_id))
+
+        if matched_task:
+            return AssistantResponse(
+                message=f"Great job! Marked '{matched_task['content']}' as done!",
+                action="complete"
+            )
+        else:
+            tasks = await _fetch_tasks(connection, SQL_SELECT_TASKS_PENDING, (user_id,))
+            return AssistantResponse(
+                message="I couldn't find that task. Here are your pending tasks:",
+                tasks=tasks,
+                action="list"
             )
-            pending_tasks = cursor.fetchall()
 
-            matched_task = None
-            for task in pending_tasks:
-                task_words = task['content'].lower().split()
-                if any(word in text_lower for word in task_words if len(word) > 3):
-                    matched_task = task
-                    break
+    # INTENT: Delete Task
+    elif tokens & _DELETE_TOKENS:
 
+        async with _db_lock:
+            matched_task = await _find_matching_pending_task(connection, user_id, text_lower)
             if matched_task:
-                cursor.execute(
-                    "DELETE FROM tasks WHERE id = ? AND user_id = ?",
-                    (matched_task['id'], user_id)
-                )
-                connection.commit()
-                return AssistantResponse(
-                    message=f"Deleted task: '{matched_task['content']}'",
-                    action="delete"
-                )
-            else:
-                tasks = [Task(**dict(row)) for row in pending_tasks]
-                return AssistantResponse(
-                    message="I couldn't find that task to delete. Here are your tasks:",
-                    tasks=tasks,
-                    action="list"
-                )
-
-        # INTENT: Add New Task (Default)
+                await connection.execute(SQL_DELETE_TASK, (matched_task['id'], user_id))
+
+        if matched_task:
+            return AssistantResponse(
+                message=f"Deleted task: '{matched_task['content']}'",
+                action="delete"
+            )
         else:
-            task_content = extract_task_content(text)
-            due_date = parse_date_from_text(text)
-
-            if not task_content or len(task_content) < 2:
-                return AssistantResponse(
-                    message="I didn't quite catch that. Try something like 'Remind me to call mom tomorrow'",
-                    action="error"
-                )
-
-            cursor.execute(
-                "INSERT INTO tasks (user_id, content, status, due_date) VALUES (?, ?, 'pending', ?)",
-                (user_id, task_content, due_date)
+            tasks = await _fetch_tasks(connection, SQL_SELECT_TASKS_PENDING, (user_id,))
+            return AssistantResponse(
+                message="I couldn't find that task to delete. Here are your tasks:",
+                tasks=tasks,
+                action="list"
             )
-            connection.commit()
 
-            if due_date:
-                date_obj = datetime.strptime(due_date, "%Y-%m-%d")
-                friendly_date = date_obj.strftime("%A, %B %d")
-                message = f"Got it! Added: '{task_content}' due {friendly_date}"
-            else:
-                message = f"Got it! Added: '{task_content}' (no due date)"
+    # INTENT: Add New Task (Default)
+    else:
+        task_content = extract_task_content(text)
+        due_date = parse_date_from_text(text)
 
+        if not task_content or len(task_content) < 2:
             return AssistantResponse(
-                message=message,
-                action="add"
+                message="I didn't quite catch that. Try something like 'Remind me to call mom tomorrow'",
+                action="error"
             )
 
-    finally:
-        connection.close()
+        async with _db_lock:
+            await connection.execute(SQL_INSERT_TASK, (user_id, task_content, due_date))
+
+        if due_date:
+            date_obj = datetime.strptime(due_date, "%Y-%m-%d")
+            friendly_date = date_obj.strftime("%A, %B %d")
+            message = f"Got it! Added: '{task_content}' due {friendly_date}"
+        else:
+            message = f"Got it! Added: '{task_content}' (no due date)"
+
+        return AssistantResponse(
+            message=message,
+            action="add"
+        )
 
 
 # =============================================================================
 # FASTAPI APPLICATION
 # =============================================================================
 
+# No custom default response class: current FastAPI serializes straight
+# to JSON bytes via Pydantic, which is the fast path now (ORJSONResponse
+# is deprecated there and warned on every request).
 app = FastAPI(
     title="Clear",
     description="Your Personal Contextual Task Assistant",
-    version="2.0.0"
+    version="2.0.0",
 )
 
 # CORS configuration - allow requests from any origin for the web app
@@ -559,12 +874,27 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup."""
-    initialize_database()
+    """Open the shared database connection and initialize the schema."""
+    global _connection, _token_sweeper_task
+    _connection = await _create_connection()
+    await initialize_database()
+    _token_sweeper_task = asyncio.create_task(_token_sweeper())
     print("Clear is starting up...")
     print("Database initialized!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the token sweeper and close the shared database connection."""
+    global _connection, _token_sweeper_task
+    if _token_sweeper_task is not None:
+        _token_sweeper_task.cancel()
+        _token_sweeper_task = None
+    if _connection is not None:
+        await _connection.close()
+        _connection = None
+
+
 # Serve the frontend HTML file
 @app.get("/")
 async def serve_frontend():
@@ -592,27 +922,24 @@ async def register(user: UserRegister):
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
 
     connection = get_database_connection()
-    cursor = connection.cursor()
 
     # Check if username exists
-    cursor.execute("SELECT id FROM users WHERE username = ?", (user.username.lower(),))
-    if cursor.fetchone():
-        connection.close()
-        raise HTTPException(status_code=400, detail="Username already taken")
-
-    # Create user
-    password_hash = hash_password(user.password)
-    cursor.execute(
-        "INSERT INTO users (username, password_hash) VALUES (?, ?)",
-        (user.username.lower(), password_hash)
-    )
-    connection.commit()
-
-    user_id = cursor.lastrowid
-    connection.close()
-
-    # Create token (auto-login)
-    token = create_token(user_id, user.username.lower())
+    async with connection.execute(SQL_SELECT_USER_ID, (user.username.lower(),)) as cursor:
+        if await cursor.fetchone():
+            raise HTTPException(status_code=400, detail="Username already taken")
+
+    # Hash in a worker thread - bcrypt is deliberately slow and would
+    # otherwise stall every other request on the event loop
+    password_hash = await hash_password_async(user.password)
+
+    # Create user and their first token in one transaction: one commit
+    # (one fsync tier under WAL) instead of two, and no window where the
+    # account exists without its session row
+    async with tx(connection):
+        cursor = await connection.execute(SQL_INSERT_USER, (user.username.lower(), password_hash))
+        user_id = cursor.lastrowid
+        token, expires = _generate_token(user_id, user.username.lower())
+        await connection.execute(SQL_INSERT_TOKEN, (user_id, token, expires))
 
     return AuthResponse(
         message="Account created successfully!",
@@ -629,21 +956,16 @@ async def login(user: UserLogin):
     Returns a token on successful login.
     """
     connection = get_database_connection()
-    cursor = connection.cursor()
 
     # Find user
-    cursor.execute(
-        "SELECT id, password_hash FROM users WHERE username = ?",
-        (user.username.lower(),)
-    )
-    row = cursor.fetchone()
-    connection.close()
+    async with connection.execute(SQL_SELECT_USER_AUTH, (user.username.lower(),)) as cursor:
+        row = await cursor.fetchone()
 
-    if not row or not verify_password(user.password, row["password_hash"]):
+    if not row or not await verify_password_async(user.password, row["password_hash"]):
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
     # Create token
-    token = create_token(row["id"], user.username.lower())
+    token = await create_token(row["id"], user.username.lower())
 
     return AuthResponse(
         message="Login successful!",
@@ -653,9 +975,12 @@ async def login(user: UserLogin):
 
 
 @app.post("/logout")
-async def logout(current_user: dict = Depends(get_current_user)):
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user)
+):
     """Log out by invalidating the current token."""
-    # In a full implementation, you would delete the token from the database
+    await invalidate_token(credentials.credentials)
     return {"message": "Logged out successfully"}
 
 
@@ -672,7 +997,7 @@ async def chat(user_input: NaturalLanguageInput, current_user: dict = Depends(ge
     if not user_input.text.strip():
         raise HTTPException(status_code=400, detail="Please enter a command")
 
-    return process_natural_language(user_input.text, current_user["user_id"])
+    return await process_natural_language(user_input.text, current_user["user_id"])
 
 
 # -----------------------------------------------------------------------------
@@ -683,28 +1008,27 @@ async def chat(user_input: NaturalLanguageInput, current_user: dict = Depends(ge
 async def get_all_tasks(current_user: dict = Depends(get_current_user)):
     """Get all tasks for the current user."""
     connection = get_database_connection()
-    cursor = connection.cursor()
-    cursor.execute(
-        "SELECT id, content, status, due_date, created_at FROM tasks WHERE user_id = ? ORDER BY status, due_date, created_at",
-        (current_user["user_id"],)
-    )
-    rows = cursor.fetchall()
-    connection.close()
-    return [Task(**dict(row)) for row in rows]
+    async with connection.execute(SQL_SELECT_ALL_TASKS, (current_user["user_id"],)) as cursor:
+        rows = await cursor.fetchall()
+    # Returning a Response directly bypasses response-model validation,
+    # and since SQL_SELECT_ALL_TASKS fixes the column order the payload
+    # is built positionally - no Row-to-dict conversion per task before
+    # orjson serializes it in one shot.
+    payload = [
+        {"id": row[0], "content": row[1], "status": row[2],
+         "due_date": row[3], "created_at": row[4]}
+        for row in rows
+    ]
+    return Response(content=orjson.dumps(payload), media_type="application/json")
 
 
 @app.delete("/tasks/{task_id}")
 async def delete_task(task_id: int, current_user: dict = Depends(get_current_user)):
     """Delete a specific task (must belong to current user)."""
     connection = get_database_connection()
-    cursor = connection.cursor()
-    cursor.execute(
-        "DELETE FROM tasks WHERE id = ? AND user_id = ?",
-        (task_id, current_user["user_id"])
-    )
-    connection.commit()
-    affected = cursor.rowcount
-    connection.close()
+    async with _db_lock:
+        cursor = await connection.execute(SQL_DELETE_TASK, (task_id, current_user["user_id"]))
+        affected = cursor.rowcount
 
     if affected == 0:
         raise HTTPException(status_code=404, detail="Task not found")
@@ -716,25 +1040,16 @@ async def delete_task(task_id: int, current_user: dict = Depends(get_current_use
 async def toggle_task_status(task_id: int, current_user: dict = Depends(get_current_user)):
     """Toggle a task between 'pending' and 'done'."""
     connection = get_database_connection()
-    cursor = connection.cursor()
 
-    cursor.execute(
-        "SELECT status FROM tasks WHERE id = ? AND user_id = ?",
-        (task_id, current_user["user_id"])
-    )
-    row = cursor.fetchone()
+    async with _db_lock:
+        async with connection.execute(SQL_SELECT_TASK_STATUS, (task_id, current_user["user_id"])) as cursor:
+            row = await cursor.fetchone()
 
-    if not row:
-        connection.close()
-        raise HTTPException(status_code=404, detail="Task not found")
+        if not row:
+            raise HTTPException(status_code=404, detail="Task not found")
 
-    new_status = "done" if row["status"] == "pending" else "pending"
-    cursor.execute(
-        "UPDATE tasks SET status = ? WHERE id = ? AND user_id = ?",
-        (new_status, task_id, current_user["user_id"])
-    )
-    connection.commit()
-    connection.close()
+        new_status = "done" if row["status"] == "pending" else "pending"
+        await connection.execute(SQL_UPDATE_TASK_STATUS, (new_status, task_id, current_user["user_id"]))
 
     return {"message": f"Task status changed to {new_status}", "new_status": new_status}
 
@@ -758,4 +1073,24 @@ if __name__ == "__main__":
     # Get port from environment variable (Railway sets this)
     port = int(os.environ.get("PORT", 8000))
 
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Multiple workers for real parallelism - each process opens its own
+    # SQLite connection and WAL lets them share the file safely. The app
+    # must be passed as an import string for workers to spawn. With
+    # uvicorn[standard] installed, the loop and http protocol default to
+    # uvloop/httptools where the platform supports them.
+    workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+    # Without a configured SECRET_KEY every worker process generates its
+    # own random key at import, so tokens minted by one worker fail HMAC
+    # verification on the others. Scale out only when the key is shared.
+    if workers > 1 and "SECRET_KEY" not in os.environ:
+        print("SECRET_KEY is not set - running a single worker so tokens")
+        print("verify consistently. Set SECRET_KEY to enable more workers.")
+        workers = 1
+
+    uvicorn.run(
+        "assistant:app",
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+    )